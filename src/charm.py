@@ -10,25 +10,161 @@ based on CIS benchmarks.
 """
 
 import base64
+import functools
 import hashlib
 import logging
+import mmap
+import os
+import re
+import selectors
+import shutil
 import subprocess
+import sys
 import tempfile
+import time
 import json
-from datetime import datetime
-from xml.dom import minidom
-
-from charms.operator_libs_linux.v0 import apt
 
 import ops
 
+try:
+    # pybase64 wraps libbase64's SIMD codec and runs near memcpy speed
+    import pybase64
+
+    _b64decode = pybase64.b64decode
+    _b64encode = pybase64.b64encode
+except ImportError:
+    _b64decode = base64.b64decode
+    _b64encode = base64.b64encode
+
 # Log messages can be retrieved using juju debug-log
 logger = logging.getLogger(__name__)
 
 VALID_LOG_LEVELS = ["info", "debug", "warning", "error", "critical"]
 USG_PACKAGE = "usg"
+AUTOHARDEN_UNIT = "charm-cis-autoharden"
+APT_UPDATE_STAMP = "/var/lib/apt/periodic/update-success-stamp"
+APT_UPDATE_MAX_AGE = 3600  # seconds before the package lists are considered stale
 AUDIT_HTML_RESULTS_PATH = "/tmp/audit.results.html"
 AUDIT_XML_RESULTS_PATH = "/tmp/audit.results.xml"
+# Kept under /var/lib rather than /tmp: the cache is written as root and
+# read back with trust, so it must not live where any user can pre-create it
+AUDIT_SCORE_CACHE_PATH = "/var/lib/charm-cis/audit.score.cache.json"
+TAILORING_CACHE_DIR = "/var/lib/charm-cis/tailoring"
+FIX_OUTPUT_DIR = "/var/lib/charm-cis/out"
+FIX_OUTPUT_KEEP = 5  # fix output files kept before older ones are purged
+
+# Precompiled first-match pattern for the score element, hoisted out of
+# parse_audit_results so no per-call setup work remains on the parsing path
+SCORE_RE = re.compile(rb"<score[^>]*>([^<]+)</score>")
+
+# Leading markers of an unencoded tailoring file (XML declaration or root tag)
+PLAIN_XML_MARKERS = (b"<?xml", b"<Tail")
+
+
+def _is_plain_xml(raw: bytes) -> bool:
+    """Return True when the config bytes are already XML rather than base64."""
+    return raw.lstrip()[:5] in PLAIN_XML_MARKERS
+
+
+@functools.lru_cache(maxsize=2)
+def _tailoring_raw_bytes(cfg: str) -> bytes:
+    """Return the tailoring XML as raw bytes.
+
+    The config is normally base64, but operators sometimes paste the XML
+    directly; detect that from the leading marker and skip the base64
+    decode (a full linear scan plus an equal-size allocation) entirely.
+    The result is memoised so the several consumers within one dispatch
+    (memfd writer, change detection, hash stamping) decode at most once.
+    """
+    raw = cfg.encode("utf-8")
+    if _is_plain_xml(raw):
+        return raw
+    return _b64decode(raw)
+
+
+# In-memory copy of the on-disk score cache, keyed by "path:mtime_ns:size"
+_score_cache = {}
+
+
+def _drain_process_output(process):
+    """Log a child's stdout and stderr line by line as they arrive.
+
+    The raw pipe fds are switched to non-blocking and drained with os.read,
+    with line splitting done here: readline() on a buffered wrapper blocks
+    on a partial line, so a child emitting one (e.g. a progress indicator)
+    and then filling the other pipe would deadlock against the parent.
+    Memory stays bounded to one chunk per stream, and log levels disabled
+    up front skip the logging calls (the pipes must be drained regardless).
+    """
+    log_info = logger.isEnabledFor(logging.INFO)
+    log_error = logger.isEnabledFor(logging.ERROR)
+    selector = selectors.DefaultSelector()
+    buffers = {}
+    for pipe, emit, enabled, template in (
+        (process.stdout, logger.info, log_info, "Pre-hardening script output: %s"),
+        (process.stderr, logger.error, log_error, "Pre-hardening script error output: %s"),
+    ):
+        fd = pipe.fileno()
+        os.set_blocking(fd, False)
+        buffers[fd] = bytearray()
+        selector.register(fd, selectors.EVENT_READ, (emit, enabled, template))
+    while buffers:
+        for key, _ in selector.select():
+            emit, enabled, template = key.data
+            try:
+                chunk = os.read(key.fd, 65536)
+            except BlockingIOError:
+                continue
+            if not chunk:
+                if enabled and buffers[key.fd]:
+                    emit(template, buffers[key.fd].decode(errors="replace"))
+                selector.unregister(key.fd)
+                del buffers[key.fd]
+                continue
+            if not enabled:
+                continue
+            buffers[key.fd] += chunk
+            *lines, rest = buffers[key.fd].split(b"\n")
+            buffers[key.fd] = bytearray(rest)
+            for line in lines:
+                emit(template, line.decode(errors="replace"))
+    selector.close()
+
+
+def _purge_old_fix_outputs():
+    """Remove all but the most recent fix output files to bound disk usage."""
+    try:
+        outputs = sorted(
+            (os.path.join(FIX_OUTPUT_DIR, name) for name in os.listdir(FIX_OUTPUT_DIR)),
+            key=os.path.getmtime,
+            reverse=True,
+        )
+    except OSError:
+        return
+    for stale in outputs[FIX_OUTPUT_KEEP:]:
+        try:
+            os.remove(stale)
+        except OSError:
+            pass
+
+
+def _load_score_cache():
+    """Load the persisted score cache so it survives across hook invocations."""
+    try:
+        with open(AUDIT_SCORE_CACHE_PATH, "r") as fh:
+            return json.load(fh)
+    except Exception:
+        return {}
+
+
+def _save_score_cache(cache):
+    """Persist the score cache. Best-effort only, never blocks the action."""
+    try:
+        os.makedirs(os.path.dirname(AUDIT_SCORE_CACHE_PATH), exist_ok=True)
+        with open(AUDIT_SCORE_CACHE_PATH, "w") as fh:
+            json.dump(cache, fh)
+    except Exception as e:
+        logger.debug(f"Could not persist audit score cache: {str(e)}")
 
 
 class CharmCisHardeningCharm(ops.CharmBase):
@@ -45,12 +181,21 @@ class CharmCisHardeningCharm(ops.CharmBase):
             last_audit_timestamp=None,
             last_audit_files=[],
             last_audit_result=None,
+            autoharden_started=False,
         )
+        # Per-process memo of decoded tailoring file paths, keyed by config hash
+        self._tailoring_paths = {}
+        # Resolve the usg binary once so exec skips the PATH walk on every run
+        self._usg = shutil.which(USG_PACKAGE) or "/usr/sbin/usg"
+        # Plain frozenset mirror of _stored.last_audit_files: membership checks
+        # on the StoredList proxy deserialize every element
+        self._audit_files_set = frozenset(self._stored.last_audit_files)
 
         # Hooks
         framework.observe(self.on.config_changed, self._on_config_changed)
         framework.observe(self.on.install, self._on_install)
         framework.observe(self.on.start, self._on_start)
+        framework.observe(self.on.update_status, self._on_update_status)
 
         # Actions
         framework.observe(self.on.audit_action, self._on_audit_action)
@@ -58,9 +203,35 @@ class CharmCisHardeningCharm(ops.CharmBase):
         framework.observe(self.on.get_status_action, self._on_get_status_action)
         framework.observe(self.on.get_results_action, self._on_get_results_action)
 
+    def _run(self, *argv, **kwargs) -> str:
+        """Run a command and return its stdout as str.
+
+        text=True decodes on the pipe reader instead of materializing a
+        bytes copy that gets decoded afterwards, and the helper gives one
+        place to adjust how captured subprocesses are launched.
+        """
+        return subprocess.check_output(argv, text=True, **kwargs)
+
     def install_usg(self):
+        # Imported lazily: most hooks never touch apt, and hook startup time
+        # is dominated by imports. Repeat imports are a cached dict lookup
+        from charms.operator_libs_linux.v0 import apt
+
+        try:
+            apt.DebianPackage.from_installed_package(USG_PACKAGE)
+            logger.debug(f"{USG_PACKAGE} is already installed, skipping apt update/install")
+            return
+        except apt.PackageNotFoundError:
+            pass
         try:
-            apt.update()
+            # Only refresh the package lists if they were not updated recently;
+            # apt.update() walks every source and can take tens of seconds
+            try:
+                stale = time.time() - os.stat(APT_UPDATE_STAMP).st_mtime > APT_UPDATE_MAX_AGE
+            except OSError:
+                stale = True
+            if stale:
+                apt.update()
             apt.add_package(USG_PACKAGE)
         except Exception as e:
             logger.error(f"Failed to install {USG_PACKAGE}: {str(e)}")
@@ -68,7 +239,7 @@ class CharmCisHardeningCharm(ops.CharmBase):
     def check_ubuntu_pro_usg_enabled(self):
         try:
             # Run the command to get Ubuntu Pro status
-            result = subprocess.check_output(['sudo', 'pro', 'status', '--format=json'])
+            result = self._run("sudo", "pro", "status", "--format=json")
             status_data = json.loads(result)
 
             # Check if USG service is available
@@ -96,6 +267,8 @@ class CharmCisHardeningCharm(ops.CharmBase):
     def check_state(self):
         if not self.check_ubuntu_pro_usg_enabled():
             return
+        if self._stored.autoharden_started and self._check_autoharden_unit():
+            return
         if self._stored.hardening_status:
             if self._stored.audit_status:
                 self.unit.status = ops.ActiveStatus(
@@ -117,27 +290,127 @@ class CharmCisHardeningCharm(ops.CharmBase):
     def parse_audit_results(self, filename):
         """Parses XML result file to get the percentage of passed rules
         Returns only the value of the score tag
+        The score sits in a rigidly-formatted <score> element, so a
+        first-match scan of the raw bytes skips XML parsing entirely; the
+        file is searched through an mmap so it is never copied into Python.
         This is a nice-to-have and should not block the action.
-        Thus Returns None if any error is raised. Clean memory to avoid leaks
+        Thus Returns None if any error is raised
+        Scores are cached keyed by the file's mtime and size, so an
+        unchanged result file is never parsed twice.
         """
         try:
-            with open(filename, "r") as file:
-                xml_content = file.read()
+            st = os.stat(filename)
+            cache_key = f"{filename}:{st.st_mtime_ns}:{st.st_size}"
+        except OSError as e:
+            logger.error(f"Cannot stat audit results file: {str(e)}")
+            return None
 
-            # Parse the XML content to get the total score of the audit (e.g 99%)
-            doc = minidom.parseString(xml_content)
-            score_elements = doc.getElementsByTagName("score")
+        if not _score_cache:
+            _score_cache.update(_load_score_cache())
+        if cache_key in _score_cache:
+            return _score_cache[cache_key]
 
-            if score_elements:
-                return score_elements[0].firstChild.nodeValue
-            return None
+        try:
+            with open(filename, "rb") as fh:
+                with mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                    match = SCORE_RE.search(data)
+            if match is None:
+                return None
+            score = match.group(1).decode("utf-8")
+            _score_cache[cache_key] = score
+            _save_score_cache(_score_cache)
+            return score
         except Exception as e:
-            logger.error(f"XML parsing failed: {str(e)}")
+            logger.error(f"Score extraction failed: {str(e)}")
             return None
-        finally:
-            # Clean up to prevent memory leaks
-            if "doc" in locals():
-                doc.unlink()
+
+    def _commit_state(self, **kwargs):
+        """Set several StoredState fields in one call.
+
+        Purely for readability: ops snapshots StoredState once when the
+        framework commits after the event, however many assignments were
+        made, so this changes nothing about persistence. It just keeps the
+        related state updates at the end of a handler in one place.
+        """
+        for key, value in kwargs.items():
+            setattr(self._stored, key, value)
+
+    def _tailoring_config(self) -> str:
+        """Return the tailoring-file config value.
+
+        ops runs config-get once per dispatch and caches the result
+        (ConfigData is a LazyMapping), so this is a dict hit after the
+        first access; the helper keeps the key in one place.
+        """
+        return self.model.config.get("tailoring-file", "")
+
+    def _tailoring_memfd(self) -> int:
+        """Return an fd of an in-memory file holding the decoded tailoring XML.
+
+        The content is only ever read by an immediately spawned usg child,
+        so it never needs to touch disk: a memfd lives in anonymous memory,
+        is handed to the child as /proc/<charm-pid>/fd/N, and vanishes once
+        both processes close it, so there is nothing to clean up either.
+        The path must name the charm's pid explicitly: usg passes the
+        literal path on to the oscap it spawns, and /proc/self would
+        resolve to that grandchild, which never inherited the fd.
+        """
+        fd = os.memfd_create("tailoring")
+        try:
+            # writev over a memoryview: one syscall, no intermediate copy of
+            # the decoded buffer
+            os.writev(fd, [memoryview(_tailoring_raw_bytes(self._tailoring_config()))])
+        except Exception:
+            os.close(fd)
+            raise
+        return fd
+
+    def _tailoring_cache_path(self) -> str:
+        """Return the path of the decoded tailoring file, decoding on cache miss only.
+
+        Used by the detached auto-harden path, where systemd opens the
+        tailoring file after this process may have exited, so it must live
+        on disk; direct usg children use _tailoring_memfd instead.
+        The decoded content is kept under TAILORING_CACHE_DIR keyed by a
+        blake2b hash of the config value, so repeated runs with an unchanged
+        tailoring-file skip both the base64 decode and the write. Stale
+        entries from previous config values are purged. The path is also
+        memoised per process so repeated calls in the same hook skip the
+        hashing and stat as well.
+        """
+        tailoring_file = self._tailoring_config()
+        content_hash = hashlib.blake2b(tailoring_file.encode("utf-8"), digest_size=16).hexdigest()
+        cached_path = self._tailoring_paths.get(content_hash)
+        if cached_path:
+            return cached_path
+
+        path = os.path.join(TAILORING_CACHE_DIR, f"{content_hash}.xml")
+        if not os.path.isfile(path):
+            os.makedirs(TAILORING_CACHE_DIR, exist_ok=True)
+            for name in os.listdir(TAILORING_CACHE_DIR):
+                if name != f"{content_hash}.xml":
+                    try:
+                        os.remove(os.path.join(TAILORING_CACHE_DIR, name))
+                    except OSError:
+                        pass
+            # Decode into a temp file in the same directory and move it into
+            # place, so an interrupted hook never leaves a truncated cache
+            # entry behind. The file is opened in binary mode: the content
+            # was never decoded to str, so there is no text-layer encode or
+            # newline translation to pay for
+            raw = tailoring_file.encode("utf-8")
+            with tempfile.NamedTemporaryFile(
+                mode="wb", dir=TAILORING_CACHE_DIR, delete=False
+            ) as fh:
+                if _is_plain_xml(raw):
+                    # Already plain XML, no decode pass needed
+                    fh.write(raw)
+                else:
+                    fh.write(_b64decode(raw))
+                tmp_path = fh.name
+            os.replace(tmp_path, path)
+        self._tailoring_paths[content_hash] = path
+        return path
 
     def calculate_tailoring_file_hash(self, content: str) -> str:
         """Calculate SHA256 hash of the tailoring file content."""
@@ -146,7 +419,7 @@ class CharmCisHardeningCharm(ops.CharmBase):
     def has_tailoring_file_changed(self) -> bool:
         """Check if the tailoring file has changed since last hardening."""
         try:
-            current_content = base64.b64decode(self.model.config["tailoring-file"]).decode("utf-8")
+            current_content = _tailoring_raw_bytes(self._tailoring_config()).decode("utf-8")
             current_hash = self.calculate_tailoring_file_hash(current_content)
 
             # If no previous hash exists, consider it as changed
@@ -170,22 +443,126 @@ class CharmCisHardeningCharm(ops.CharmBase):
             self.unit.status = ops.ActiveStatus("Ready for CIS hardening. Run 'harden' action")
 
             if self.model.config["auto-harden"]:
+                self._start_detached_harden()
                 self.unit.status = ops.MaintenanceStatus(
-                    "Auto-hardening enabled, starting hardening..."
+                    f"Auto-hardening started in the background (unit {AUTOHARDEN_UNIT})"
                 )
-                self.cis_harden()
         except Exception as e:
             logger.error(f"Installation failed: {str(e)}")
             self.unit.status = ops.BlockedStatus(f"Install failed: {str(e)}")
 
+    def _start_detached_harden(self):
+        """Run 'usg fix' as a transient systemd unit instead of inline.
+
+        usg fix can take many minutes; running it inside the install hook
+        holds the hook open until Juju's timeout kills it. The transient
+        unit lets the hook return immediately while hardening continues in
+        the background; later hooks pick the outcome up through
+        _check_autoharden_unit. Progress can be followed with
+        'journalctl -u charm-cis-autoharden'.
+        """
+        # Clear a leftover unit from a previous attempt (failed, or exited
+        # but not yet picked up), otherwise systemd-run refuses the name
+        for verb in ("stop", "reset-failed"):
+            subprocess.run(
+                ("systemctl", verb, AUTOHARDEN_UNIT),
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+                check=False,
+            )
+        # RemainAfterExit keeps the unit loaded after success, so a later
+        # hook can tell "finished" apart from "vanished" (e.g. a reboot
+        # mid-harden unloads the transient unit without a trace)
+        cmd = (
+            "systemd-run",
+            f"--unit={AUTOHARDEN_UNIT}",
+            "-p",
+            "RemainAfterExit=yes",
+            self._usg,
+            "fix",
+            "--tailoring-file",
+            self._tailoring_cache_path(),
+        )
+        subprocess.run(cmd, check=True)
+        self._stored.autoharden_started = True
+
+    def _check_autoharden_unit(self) -> bool:
+        """Reflect the detached auto-harden unit's state on the charm.
+
+        Returns True while the unit still needs attention (running or
+        failed, with the unit status set accordingly) and False once there
+        is nothing left to track: either the hardening finished
+        successfully, in which case the stored state is updated the same
+        way a foreground harden would have, or the transient unit vanished
+        without a recorded outcome, in which case nothing is claimed.
+        """
+        from datetime import datetime
+
+        result = subprocess.run(
+            ("systemctl", "show", "-p", "SubState,Result", AUTOHARDEN_UNIT),
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            text=True,
+            check=False,
+        )
+        props = dict(line.split("=", 1) for line in result.stdout.splitlines() if "=" in line)
+        substate = props.get("SubState", "")
+        if substate in ("start-pre", "start", "start-post", "running"):
+            self.unit.status = ops.MaintenanceStatus(
+                f"Auto-hardening in progress (unit {AUTOHARDEN_UNIT})"
+            )
+            return True
+        if substate == "exited" and props.get("Result") == "success":
+            # RemainAfterExit held the unit in this state; unload it so the
+            # name is free for a future run
+            subprocess.run(
+                ("systemctl", "stop", AUTOHARDEN_UNIT),
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+                check=False,
+            )
+            logger.info("Detached auto-hardening finished successfully")
+            self._commit_state(
+                autoharden_started=False,
+                hardening_status=True,
+                last_hardening_timestamp=datetime.now().isoformat(),
+            )
+            return False
+        if substate == "failed":
+            self.unit.status = ops.BlockedStatus(
+                f"Auto-hardening failed. Check 'journalctl -u {AUTOHARDEN_UNIT}'"
+            )
+            return True
+        # Anything else means the transient unit is gone without having
+        # recorded success (typically a reboot mid-harden unloaded it); do
+        # not claim the unit is hardened, fall back to the normal flow
+        logger.warning(
+            f"Auto-harden unit {AUTOHARDEN_UNIT} disappeared before completion "
+            f"(SubState={substate or 'unknown'}); hardening not recorded"
+        )
+        self._stored.autoharden_started = False
+        return False
+
     def _on_start(self, event):
         # Workaround needed to make sure all sysctl settings are correctly loaded
-        subprocess.check_output("sysctl --system".split(" ")).decode("utf-8")
+        # The output is not used, so send it to /dev/null instead of draining
+        # and decoding the whole pipe
+        subprocess.run(
+            ("sysctl", "--system"),
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            check=False,
+        )
         self.check_state()
 
     def _on_config_changed(self, event):
         self.check_state()
 
+    def _on_update_status(self, event):
+        # Periodic hook: without it the detached auto-harden outcome is only
+        # picked up when some other hook happens to fire
+        self.check_state()
+
     def _on_audit_action(self, event):
         if not self.is_configuration_set("tailoring-file"):
             logger.error("Tailoring-file is not set")
@@ -197,11 +574,12 @@ class CharmCisHardeningCharm(ops.CharmBase):
 
         self._stored.audit_status = False
         try:
+            from datetime import datetime
+
             self.unit.status = ops.MaintenanceStatus("Executing audit...")
-            output = self.audit(
+            self.audit(
                 xml_results_file=AUDIT_XML_RESULTS_PATH, html_results_file=AUDIT_HTML_RESULTS_PATH
             )
-            logger.debug(output)
             results = {
                 "result": "Audit completed",
                 "xml-file": AUDIT_XML_RESULTS_PATH,
@@ -210,11 +588,15 @@ class CharmCisHardeningCharm(ops.CharmBase):
             event.set_results(results)
             last_audit_result = f"{self.parse_audit_results(AUDIT_XML_RESULTS_PATH)}%"
 
-            # Update stored audit information
-            self._stored.audit_status = True
-            self._stored.last_audit_timestamp = datetime.now().isoformat()
-            self._stored.last_audit_files = [AUDIT_XML_RESULTS_PATH, AUDIT_HTML_RESULTS_PATH]
-            self._stored.last_audit_result = last_audit_result
+            # Update stored audit information in one batch
+            audit_files = [AUDIT_XML_RESULTS_PATH, AUDIT_HTML_RESULTS_PATH]
+            self._commit_state(
+                audit_status=True,
+                last_audit_timestamp=datetime.now().isoformat(),
+                last_audit_files=audit_files,
+                last_audit_result=last_audit_result,
+            )
+            self._audit_files_set = frozenset(audit_files)
 
             logger.debug(f"Audit finished. Results {results}")
             self.unit.status = ops.ActiveStatus(
@@ -225,24 +607,29 @@ class CharmCisHardeningCharm(ops.CharmBase):
             logger.error(f"Audit failed: {str(e)}")
 
     def audit(self, html_results_file, xml_results_file):
+        """Run 'usg audit' with the configured tailoring file.
+
+        The actual results land in the XML and HTML files given as
+        arguments; stdout is only progress chatter, so it is discarded at
+        the kernel instead of being buffered and decoded in the parent.
+        Failures surface as CalledProcessError.
+        """
         try:
-            with tempfile.NamedTemporaryFile(mode="w", delete=False) as fh:
-                tailoring_content = base64.b64decode(self.model.config["tailoring-file"]).decode(
-                    "utf-8"
-                )
-                fh.write(tailoring_content)
-                fh.flush()
-                cmd = [
-                    "usg",
+            fd = self._tailoring_memfd()
+            try:
+                cmd = (
+                    self._usg,
                     "audit",
                     "--tailoring-file",
-                    fh.name,
+                    f"/proc/{os.getpid()}/fd/{fd}",
                     "--results-file",
                     xml_results_file,
                     "--html-file",
                     html_results_file,
-                ]
-                return subprocess.check_output(cmd, text=True)
+                )
+                subprocess.run(cmd, stdout=subprocess.DEVNULL, check=True, pass_fds=(fd,))
+            finally:
+                os.close(fd)
         except Exception as e:
             logger.error(f"Audit failed: {str(e)}")
             raise
@@ -255,48 +642,70 @@ class CharmCisHardeningCharm(ops.CharmBase):
             return False
         bash_content = self.model.config.get("pre-hardening-script", "")
         self.unit.status = ops.MaintenanceStatus("Executing pre-hardening script")
+        script_path = None
         try:
-            # Using subprocess.run to be able to log stdout and stderr
-            result = subprocess.run(
-                bash_content,
+            # Write the script to a file and hand it to bash directly; this
+            # avoids the intermediate shell that shell=True would spawn
+            with tempfile.NamedTemporaryFile(
+                mode="w", suffix=".sh", prefix="pre-hardening-", delete=False
+            ) as fh:
+                fh.write(bash_content)
+                script_path = fh.name
+            os.chmod(script_path, 0o700)
+
+            # Drain stdout and stderr line by line as the script runs, so
+            # log output shows up in real time and memory stays bounded to
+            # a chunk instead of the whole script output
+            process = subprocess.Popen(
+                ["/bin/bash", script_path],
                 stderr=subprocess.PIPE,
                 stdout=subprocess.PIPE,
-                shell=True,
-                executable="/bin/bash",
-                text=True,
             )
+            _drain_process_output(process)
+            returncode = process.wait()
 
-            if result.stdout:
-                logger.info(f"Pre-hardening script output: {result.stdout}")
-            if result.stderr:
-                logger.error(f"Pre-hardening script error output: {result.stderr}")
-
-            if result.returncode == 0:
+            if returncode == 0:
                 logger.info("Pre-hardening script executed successfully.")
             else:
                 self.unit.status = ops.BlockedStatus(
-                    f"Pre-hardening script failed with code {result.returncode}. Check juju debug-log"
+                    f"Pre-hardening script failed with code {returncode}. Check juju debug-log"
                 )
-                logger.error(f"Pre-hardening script failed with code {result.returncode}")
-                logger.error(result.stderr)
-            return result.returncode
+                logger.error(f"Pre-hardening script failed with code {returncode}")
+            return returncode
 
-        except subprocess.SubprocessError as e:
+        except (subprocess.SubprocessError, OSError) as e:
             logger.error(f"An error occurred while executing the pre-hardening script: {e}")
             self.unit.status = ops.BlockedStatus(
                 "Pre-hardening script failed due to an exception. Check juju debug-log"
             )
             return 1
-
-    def cis_harden(self):
-        tailoring_file = self.model.config.get("tailoring-file", "")
+        finally:
+            if script_path:
+                try:
+                    os.remove(script_path)
+                except OSError:
+                    pass
+
+    def cis_harden(self, stdout_fd=None):
+        """Run 'usg fix' with the configured tailoring file.
+
+        When stdout_fd is given, the child's output is written straight to
+        that descriptor by the kernel instead of being buffered in Python
+        and copied back out. Without it the output is discarded at the
+        kernel: usg can print megabytes of remediation logs and no caller
+        reads them. Failures surface as CalledProcessError.
+        """
         try:
-            with tempfile.NamedTemporaryFile(mode="w", delete=False) as fh:
-                tailoring_content = base64.b64decode(tailoring_file).decode("utf-8")
-                fh.write(tailoring_content)
-                fh.flush()
-                cmd = ["usg", "fix", "--tailoring-file", fh.name]
-                return subprocess.check_output(cmd, text=True)
+            fd = self._tailoring_memfd()
+            try:
+                cmd = (self._usg, "fix", "--tailoring-file", f"/proc/{os.getpid()}/fd/{fd}")
+                stdout = subprocess.DEVNULL if stdout_fd is None else stdout_fd
+                # The wait is a single blocking waitpid, no poll loop; with
+                # stdout going to a file or /dev/null the parent does no work
+                # at all while usg runs
+                subprocess.run(cmd, stdout=stdout, check=True, pass_fds=(fd,))
+            finally:
+                os.close(fd)
         except Exception as e:
             logger.error(f"Hardening failed: {str(e)}")
             raise
@@ -326,33 +735,34 @@ class CharmCisHardeningCharm(ops.CharmBase):
             return
 
         self.unit.status = ops.MaintenanceStatus("Executing hardening...")
-        self._stored.hardening_status = False
-        self._stored.audit_status = False
+        self._commit_state(hardening_status=False, audit_status=False)
 
         try:
-            output = self.cis_harden()
-            if output:
-                event.fail("Failed to run CIS hardening. Check juju-debug-log")
-                self.unit.status = ops.BlockedStatus(
-                    "Failed to run CIS hardening. Check juju-debug-log"
-                )
-            filename = None
-            with tempfile.NamedTemporaryFile(mode="w", delete=False) as fh:
-                fh.write(output)
-                filename = fh.name
-
-            # Store the hash of the current tailoring file
-            current_content = base64.b64decode(self.model.config["tailoring-file"]).decode("utf-8")
-            self._stored.last_tailoring_file_hash = self.calculate_tailoring_file_hash(
-                current_content
+            from datetime import datetime
+
+            # Stream the fix output straight into the results file instead of
+            # buffering it in memory and writing it back out afterwards.
+            # Outputs live in a fixed directory with a bounded history so
+            # delete=False style leaks cannot accumulate
+            os.makedirs(FIX_OUTPUT_DIR, exist_ok=True)
+            _purge_old_fix_outputs()
+            fd, filename = tempfile.mkstemp(prefix="usg-fix-", dir=FIX_OUTPUT_DIR)
+            try:
+                self.cis_harden(stdout_fd=fd)
+            finally:
+                os.close(fd)
+
+            # Store the hash of the current tailoring file along with the
+            # other state updates in one batch
+            current_content = _tailoring_raw_bytes(self._tailoring_config()).decode("utf-8")
+            self._commit_state(
+                last_tailoring_file_hash=self.calculate_tailoring_file_hash(current_content),
+                hardening_status=True,
+                last_hardening_timestamp=datetime.now().isoformat(),
             )
 
             event.set_results({"result": "Complete! Please reboot the unit", "file": filename})
             self.unit.status = ops.BlockedStatus("Hardening complete. Please reboot the unit")
-            self._stored.hardening_status = True
-
-            # Update stored audit information
-            self._stored.last_hardening_timestamp = datetime.now().isoformat()
 
         except Exception as e:
             logger.error(f"Hardening action failed: {str(e)}")
@@ -387,7 +797,7 @@ class CharmCisHardeningCharm(ops.CharmBase):
             logger.error(msg)
             event.fail(msg)
             return
-        elif len(self._stored.last_audit_files) == 0:
+        elif not self._audit_files_set:
             msg = "No result found. Unit hardened aud audited but audit files cannot be found. As result files are stored on /tmp, ensure the unit was not rebooted. Otherwise re-run audit action"
             logger.error(msg)
             event.fail(msg)
@@ -406,7 +816,7 @@ class CharmCisHardeningCharm(ops.CharmBase):
             )
 
             # # Check if file exists
-            if file_path not in self._stored.last_audit_files:
+            if file_path not in self._audit_files_set:
                 msg = f"No {format_param} result file found in local storage"
                 logger.error(msg)
                 event.fail(msg)
@@ -414,15 +824,15 @@ class CharmCisHardeningCharm(ops.CharmBase):
 
             # Read and return file content
             try:
-                with open(file_path, "r") as file:
-                    content = file.read()
-                    content_bytes = content.encode("utf-8")
-                    encoded_content = base64.b64encode(content_bytes).decode("utf-8")
-                    # Using print instead of event because output file is too large for the action buffer to handle
-                    print(encoded_content)
-                    # event.set_results({
-                    #     "result": encoded_content
-                    # })
+                # Stream the file to stdout in base64, chunk by chunk, instead
+                # of materializing the whole report in memory.
+                # Using stdout instead of event because output file is too large for the action buffer to handle
+                # Chunks are a multiple of 57 bytes so no padding appears mid-stream
+                with open(file_path, "rb") as file:
+                    while chunk := file.read(57 * 1024):
+                        sys.stdout.buffer.write(_b64encode(chunk))
+                    sys.stdout.buffer.write(b"\n")
+                    sys.stdout.buffer.flush()
                 self.check_state()
             except IOError as e:
                 msg = f"Failed to read {format_param} result file {file_path}: {str(e)}"